@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Shared front for get_call_details() used by concurrent consumers.
+Concurrent lookups of the same call ID, from threads or asyncio tasks,
+share one HTTP request, and calls that are still in progress are briefly
+cached so pollers don't each hit the API.
+"""
+
+import asyncio
+import copy
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from fetch_call import get_call_details
+
+DEFAULT_TTL = 2.0
+
+# Seconds before the shared HTTP request gives up
+DEFAULT_FETCH_TIMEOUT = 30.0
+
+# Statuses after which a call record no longer changes state
+TERMINAL_STATUSES = {"ended", "completed", "failed", "canceled", "voicemail", "busy"}
+
+
+class CallLookup:
+    """
+    Single-flight, micro-cached get_call_details() for one API key.
+
+    Safe to share between threads and asyncio tasks. Each caller gets its
+    own copy of the call record. Records with a terminal status are not
+    cached here; keep them in a call store if they are needed again.
+
+    fetch is called as fetch(api_key, call_id, timeout=fetch_timeout), so
+    one hung request can't stall every consumer waiting on it.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        ttl: float = DEFAULT_TTL,
+        fetch: Optional[Callable[..., dict]] = None,
+        fetch_timeout: Optional[float] = DEFAULT_FETCH_TIMEOUT,
+    ):
+        self.api_key = api_key
+        self.ttl = ttl
+        self.fetch_timeout = fetch_timeout
+        self.fetch = fetch or get_call_details
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._cache = {}
+
+    def _claim(self, call_id: str):
+        """
+        Return (future, is_leader) for call_id.
+
+        The leader must call _fetch_into() to resolve the future; everyone
+        else just waits on it.
+        """
+        with self._lock:
+            cached = self._cache.get(call_id)
+            if cached is not None:
+                expires_at, call_details = cached
+                if time.monotonic() < expires_at:
+                    future = Future()
+                    future.set_result(call_details)
+                    return future, False
+                del self._cache[call_id]
+
+            future = self._in_flight.get(call_id)
+            if future is not None:
+                return future, False
+
+            future = Future()
+            self._in_flight[call_id] = future
+            return future, True
+
+    def _fetch_into(self, call_id: str, future: Future):
+        try:
+            call_details = self.fetch(self.api_key, call_id, timeout=self.fetch_timeout)
+            if not isinstance(call_details, dict):
+                raise TypeError(f"Unexpected call details for {call_id}: {type(call_details).__name__}")
+            if self.ttl > 0 and call_details.get("status") not in TERMINAL_STATUSES:
+                self._cache_put(call_id, call_details)
+        except BaseException as e:
+            self._resolve(call_id, future, exception=e)
+        else:
+            self._resolve(call_id, future, result=call_details)
+
+    def _resolve(self, call_id: str, future: Future, result: dict = None, exception: BaseException = None):
+        """Release the in-flight slot for call_id and wake every waiter."""
+        try:
+            with self._lock:
+                if self._in_flight.get(call_id) is future:
+                    del self._in_flight[call_id]
+        finally:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+    def _cache_put(self, call_id: str, call_details: dict):
+        now = time.monotonic()
+        with self._lock:
+            # Entries are kept in insertion order, which is also expiry
+            # order, so expired ones are all at the front
+            while self._cache:
+                oldest = next(iter(self._cache))
+                if self._cache[oldest][0] > now:
+                    break
+                del self._cache[oldest]
+            self._cache.pop(call_id, None)
+            self._cache[call_id] = (now + self.ttl, call_details)
+
+    def get(self, call_id: str, timeout: Optional[float] = None) -> dict:
+        """
+        Fetch call details, sharing any request already in flight.
+
+        timeout bounds the wait for a request another caller started
+        (raising concurrent.futures.TimeoutError); a caller that makes the
+        request itself is bounded by fetch_timeout.
+        """
+        future, is_leader = self._claim(call_id)
+        if is_leader:
+            self._fetch_into(call_id, future)
+        return copy.deepcopy(future.result(timeout))
+
+    async def aget(self, call_id: str, timeout: Optional[float] = None) -> dict:
+        """
+        Async version of get(); the HTTP request runs in the default executor.
+
+        timeout bounds the wait (raising asyncio.TimeoutError) without
+        cancelling the request for other waiters.
+        """
+        future, is_leader = self._claim(call_id)
+        if is_leader:
+            try:
+                loop = asyncio.get_running_loop()
+                loop.run_in_executor(None, self._fetch_into, call_id, future)
+            except BaseException as e:
+                self._resolve(call_id, future, exception=e)
+                raise
+        # Shield so a cancelled task doesn't cancel the request for other waiters
+        shared = asyncio.shield(asyncio.wrap_future(future))
+        return copy.deepcopy(await asyncio.wait_for(shared, timeout))
+
+    def invalidate(self, call_id: Optional[str] = None):
+        """Drop cached records for call_id, or for every call."""
+        with self._lock:
+            if call_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(call_id, None)
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Compact on-disk store for Vapi call records.
+Keeps one canonical message list per call, stores the transcript and
+artifact copies as deltas against views rebuilt from it, and interns
+repeated strings across calls.
+"""
+
+import argparse
+import contextlib
+import copy
+import json
+import os
+import stat
+import sys
+from difflib import SequenceMatcher
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single writer only
+    fcntl = None
+
+STORE_VERSION = 1
+
+# Message fields whose string values go through the shared string table
+INTERNED_FIELDS = ("role", "message", "content")
+
+# Vapi roles as they appear in the plain-text transcript
+TRANSCRIPT_PREFIXES = {"bot": "AI", "assistant": "AI", "user": "User"}
+
+# Vapi roles as they appear in messagesOpenAIFormatted
+OPENAI_ROLES = {"system": "system", "bot": "assistant", "user": "user"}
+
+
+class StringTable:
+    """Table of strings shared by every call in a store."""
+
+    def __init__(self, strings: list = None):
+        self.strings = list(strings or [])
+        self.index = {s: i for i, s in enumerate(self.strings)}
+
+    def intern(self, value: str) -> int:
+        """Return the table index for value, adding it if new."""
+        idx = self.index.get(value)
+        if idx is None:
+            idx = len(self.strings)
+            self.strings.append(value)
+            self.index[value] = idx
+        return idx
+
+    def lookup(self, idx: int) -> str:
+        return self.strings[idx]
+
+
+def transcript_lines(messages: list) -> list:
+    """Rebuild the lines of Vapi's plain-text transcript from the message list."""
+    lines = []
+    for msg in messages:
+        prefix = TRANSCRIPT_PREFIXES.get(msg.get("role"))
+        if prefix and isinstance(msg.get("message"), str):
+            lines.append(f"{prefix}: {msg['message']}")
+    return lines
+
+
+def build_transcript(messages: list) -> str:
+    """Rebuild Vapi's plain-text transcript from the message list."""
+    return "\n".join(transcript_lines(messages))
+
+
+def build_openai_messages(messages: list) -> list:
+    """Rebuild the OpenAI-formatted message list from the message list."""
+    formatted = []
+    for msg in messages:
+        role = OPENAI_ROLES.get(msg.get("role"))
+        if role and isinstance(msg.get("message"), str):
+            formatted.append({"role": role, "content": msg["message"]})
+    return formatted
+
+
+def diff_entries(stored: list, rebuilt: list) -> list:
+    """
+    Describe stored as edits against rebuilt.
+
+    Returns a list of {"copy": n} (take the next n rebuilt entries),
+    {"skip": n} (drop the next n) and {"insert": [...]} (literal entries),
+    so a view that differs only by a few tool messages stays small.
+    """
+    rebuilt_keys = [json.dumps(entry, sort_keys=True) for entry in rebuilt]
+    stored_keys = [json.dumps(entry, sort_keys=True) for entry in stored]
+    matcher = SequenceMatcher(None, rebuilt_keys, stored_keys, autojunk=False)
+
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append({"copy": i2 - i1})
+            continue
+        if i2 > i1:
+            ops.append({"skip": i2 - i1})
+        if j2 > j1:
+            ops.append({"insert": stored[j1:j2]})
+    return ops
+
+
+def patch_entries(rebuilt: list, ops: list) -> list:
+    """Apply edits from diff_entries() to rebuilt."""
+    result = []
+    pos = 0
+    for op in ops:
+        if "copy" in op:
+            result.extend(rebuilt[pos:pos + op["copy"]])
+            pos += op["copy"]
+        elif "skip" in op:
+            pos += op["skip"]
+        else:
+            result.extend(op["insert"])
+    return result
+
+
+def _encode_message(msg: dict, table: StringTable) -> dict:
+    encoded = {}
+    interned = {}
+    for key, value in msg.items():
+        if key in INTERNED_FIELDS and isinstance(value, str):
+            interned[key] = table.intern(value)
+        else:
+            encoded[key] = value
+    if interned:
+        encoded["_s"] = interned
+    return encoded
+
+
+def _decode_message(encoded: dict, table: StringTable) -> dict:
+    msg = {key: value for key, value in encoded.items() if key != "_s"}
+    for key, idx in encoded.get("_s", {}).items():
+        msg[key] = table.lookup(idx)
+    return msg
+
+
+def encode_call(call_details: dict, table: StringTable) -> dict:
+    """
+    Normalize a call record for storage.
+
+    The transcript and artifact copies are replaced by deltas against the
+    views rebuilt from the canonical message list and listed under
+    "views"; decode_call() reproduces them exactly.
+    """
+    call = copy.deepcopy(call_details)
+    artifact = call.get("artifact")
+    if not isinstance(artifact, dict):
+        artifact = {}
+
+    if isinstance(call.get("messages"), list):
+        source = "messages"
+        messages = call.pop("messages")
+    elif isinstance(artifact.get("messages"), list):
+        source = "artifact.messages"
+        messages = artifact.pop("messages")
+    else:
+        return {"call": call, "source": None, "messages": [], "views": {}}
+
+    views = {}
+    if source == "messages" and isinstance(artifact.get("messages"), list):
+        views["artifact.messages"] = diff_entries(artifact.pop("messages"), messages)
+
+    rebuilt_lines = transcript_lines(messages)
+    for view, holder in (("transcript", call), ("artifact.transcript", artifact)):
+        if isinstance(holder.get("transcript"), str):
+            views[view] = diff_entries(holder.pop("transcript").split("\n"), rebuilt_lines)
+
+    if isinstance(artifact.get("messagesOpenAIFormatted"), list):
+        views["artifact.messagesOpenAIFormatted"] = diff_entries(
+            artifact.pop("messagesOpenAIFormatted"), build_openai_messages(messages)
+        )
+
+    return {
+        "call": call,
+        "source": source,
+        "messages": [_encode_message(msg, table) for msg in messages],
+        "views": views,
+    }
+
+
+def decode_call(record: dict, table: StringTable) -> dict:
+    """Rebuild the full call record produced by get_call_details()."""
+    call = copy.deepcopy(record["call"])
+    source = record.get("source")
+    if source is None:
+        return call
+
+    messages = [_decode_message(msg, table) for msg in record["messages"]]
+    if source == "messages":
+        call["messages"] = messages
+    else:
+        call.setdefault("artifact", {})["messages"] = messages
+
+    for view, ops in record.get("views", {}).items():
+        artifact = call.setdefault("artifact", {}) if view.startswith("artifact.") else None
+        if view == "transcript":
+            call["transcript"] = "\n".join(patch_entries(transcript_lines(messages), ops))
+        elif view == "artifact.transcript":
+            artifact["transcript"] = "\n".join(patch_entries(transcript_lines(messages), ops))
+        elif view == "artifact.messages":
+            artifact["messages"] = copy.deepcopy(patch_entries(messages, ops))
+        elif view == "artifact.messagesOpenAIFormatted":
+            artifact["messagesOpenAIFormatted"] = patch_entries(build_openai_messages(messages), ops)
+
+    return call
+
+
+class CallStore:
+    """A JSON file of encoded call records sharing one string table."""
+
+    def __init__(self, path: str, data: dict = None):
+        self.path = path
+        self.table = StringTable()
+        self.records = {}
+        if data is not None:
+            self.load_data(data)
+        elif os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def is_store_data(data) -> bool:
+        """Tell whether parsed JSON looks like a call store (of any version)."""
+        return isinstance(data, dict) and "calls" in data and "strings" in data
+
+    def load(self):
+        with open(self.path) as f:
+            self.load_data(json.load(f))
+
+    def load_data(self, data: dict):
+        """Load already-parsed store contents, checking format and version."""
+        if not self.is_store_data(data):
+            raise ValueError(f"{self.path} is not a call store")
+        if data.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported call store version: {data.get('version')}")
+        self.table = StringTable(data["strings"])
+        self.records = data["calls"]
+
+    def compact(self):
+        """Rebuild the string table from the live records, dropping unused strings."""
+        table = StringTable()
+        for record in self.records.values():
+            for msg in record["messages"]:
+                if "_s" in msg:
+                    msg["_s"] = {
+                        key: table.intern(self.table.lookup(idx))
+                        for key, idx in msg["_s"].items()
+                    }
+        self.table = table
+
+    def save(self):
+        # Replaced records leave strings behind; drop them before writing
+        self.compact()
+        data = {
+            "version": STORE_VERSION,
+            "strings": self.table.strings,
+            "calls": self.records,
+        }
+        # Write to a temp file first so a crash never leaves a truncated
+        # store. open() creates it with the umask default; an existing
+        # store keeps its own mode.
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
+            if os.path.exists(self.path):
+                os.chmod(tmp_path, stat.S_IMODE(os.stat(self.path).st_mode))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def put(self, call_details: dict) -> str:
+        """Add or replace a call record, keyed by its call ID."""
+        call_id = call_details.get("id")
+        if not call_id:
+            raise ValueError("Call record has no 'id'")
+        self.records[call_id] = encode_call(call_details, self.table)
+        return call_id
+
+    def get(self, call_id: str) -> dict:
+        """Return the full call record for call_id."""
+        return decode_call(self.records[call_id], self.table)
+
+    def __contains__(self, call_id: str) -> bool:
+        return call_id in self.records
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+@contextlib.contextmanager
+def locked_store(path: str):
+    """
+    Open the store at path while holding an exclusive lock on it.
+
+    Use this around load, put and save so concurrent writers don't drop
+    each other's calls. The lock lives in a "<path>.lock" sidecar file.
+    """
+    with open(f"{path}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield CallStore(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store and read back Vapi call records")
+    parser.add_argument("--store", required=True, help="Path to the call store file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="Add call records to the store")
+    add_parser.add_argument("--call-id", action="append", default=[], help="Fetch this call from Vapi and store it")
+    add_parser.add_argument("--file", action="append", default=[], help="Store a call record (or list of records) from a JSON file")
+
+    get_parser = subparsers.add_parser("get", help="Print a stored call record as JSON")
+    get_parser.add_argument("--call-id", required=True, help="The Vapi call ID")
+
+    subparsers.add_parser("list", help="List stored call IDs")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "add":
+            if not args.call_id and not args.file:
+                parser.error("add needs --call-id or --file")
+
+            # Gather everything first so the store is locked only briefly
+            calls = []
+            for path in args.file:
+                with open(path) as f:
+                    data = json.load(f)
+                calls.extend(data if isinstance(data, list) else [data])
+            if args.call_id:
+                from fetch_call import get_api_key, get_call_details
+
+                api_key = get_api_key()
+                for call_id in args.call_id:
+                    calls.append(get_call_details(api_key, call_id))
+
+            try:
+                with locked_store(args.store) as store:
+                    stored = [store.put(call_details) for call_details in calls]
+                    store.save()
+            except Exception:
+                print("Nothing was saved to the store", file=sys.stderr)
+                raise
+            for call_id in stored:
+                print(f"Stored {call_id}")
+
+        elif args.command == "get":
+            store = CallStore(args.store)
+            if args.call_id not in store:
+                print(f"Error: call {args.call_id} not in store", file=sys.stderr)
+                sys.exit(1)
+            print(json.dumps(store.get(args.call_id), indent=2, default=str))
+
+        elif args.command == "list":
+            for call_id in CallStore(args.store):
+                print(call_id)
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
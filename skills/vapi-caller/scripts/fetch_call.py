@@ -8,9 +8,12 @@ import argparse
 import json
 import os
 import sys
+from typing import Optional
 
 import requests
 
+from call_store import locked_store
+
 VAPI_API_URL = "https://api.vapi.ai"
 
 
@@ -23,7 +26,7 @@ def get_api_key() -> str:
     return api_key
 
 
-def get_call_details(api_key: str, call_id: str) -> dict:
+def get_call_details(api_key: str, call_id: str, timeout: Optional[float] = None) -> dict:
     """Get detailed call information including transcript and structured data."""
     headers = {
         "Authorization": f"Bearer {api_key}",
@@ -33,6 +36,7 @@ def get_call_details(api_key: str, call_id: str) -> dict:
     response = requests.get(
         f"{VAPI_API_URL}/call/{call_id}",
         headers=headers,
+        timeout=timeout,
     )
     response.raise_for_status()
     return response.json()
@@ -145,6 +149,7 @@ def main():
     parser = argparse.ArgumentParser(description="Fetch Vapi call details by ID")
     parser.add_argument("--call-id", required=True, help="The Vapi call ID")
     parser.add_argument("--json", action="store_true", help="Output raw JSON only")
+    parser.add_argument("--store", default=None, help="Also save the call record to this call store file")
 
     args = parser.parse_args()
 
@@ -162,6 +167,16 @@ def main():
             summary = format_summary(call_details)
             print(summary)
 
+        # Save last so a store problem never hides the results above
+        if args.store:
+            try:
+                with locked_store(args.store) as store:
+                    store.put(call_details)
+                    store.save()
+            except Exception as e:
+                print(f"Error saving call to store {args.store}: {e}", file=sys.stderr)
+                sys.exit(1)
+
     except requests.exceptions.HTTPError as e:
         print(f"HTTP Error: {e}", file=sys.stderr)
         if e.response is not None:
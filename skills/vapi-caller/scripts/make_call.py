@@ -13,6 +13,8 @@ from typing import Optional
 
 import requests
 
+from call_store import locked_store
+
 VAPI_API_URL = "https://api.vapi.ai"
 DEFAULT_ASSISTANT_ID = "2c9b265d-0171-4017-8e95-2a6679ee37ec"
 DEFAULT_PHONE_NUMBER = "+17372381022"
@@ -241,6 +243,7 @@ def main():
     parser.add_argument("--assistant-id", default=DEFAULT_ASSISTANT_ID, help="Vapi assistant ID")
     parser.add_argument("--from-number", default=DEFAULT_PHONE_NUMBER, help="Source phone number")
     parser.add_argument("--voice", default=None, help="OpenAI voice to use (alloy, echo, fable, onyx, nova, shimmer, marin)")
+    parser.add_argument("--store", default=None, help="Also save the final call record to this call store file")
 
     args = parser.parse_args()
 
@@ -280,6 +283,16 @@ def main():
         print("=" * 60)
         print(json.dumps(call_details, indent=2, default=str))
 
+        # Save last so a store problem never hides the results above
+        if args.store:
+            try:
+                with locked_store(args.store) as store:
+                    store.put(call_details)
+                    store.save()
+            except Exception as e:
+                print(f"Error saving call to store {args.store}: {e}", file=sys.stderr)
+                sys.exit(1)
+
     except requests.exceptions.HTTPError as e:
         print(f"HTTP Error: {e}", file=sys.stderr)
         if e.response is not None:
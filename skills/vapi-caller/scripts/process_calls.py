@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Re-run post-processing over a backlog of stored Vapi call records.
+Extraction, formatting and validation are fanned out across a process pool
+in chunks; results are written in input order.
+"""
+
+import argparse
+import collections
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from call_store import CallStore, StringTable, decode_call
+from fetch_call import extract_order_summary, format_summary
+
+DEFAULT_CHUNK_SIZE = 64
+
+
+def list_input_files(path: str) -> list:
+    """Return path, or every JSON and JSON Lines file in it if it is a directory."""
+    if not os.path.isdir(path):
+        return [path]
+    return [
+        os.path.join(path, name)
+        for name in sorted(os.listdir(path))
+        if name.endswith((".json", ".jsonl"))
+    ]
+
+
+def _write_table(table: StringTable, table_dir: str, table_id: int) -> str:
+    """Write a store's string table where the workers can load it once each."""
+    path = os.path.join(table_dir, f"{table_id}.json")
+    with open(path, "w") as f:
+        json.dump(table.strings, f, separators=(",", ":"), ensure_ascii=False)
+    return path
+
+
+def iter_file_records(path: str, table_dir: str, table_id: int):
+    """
+    Yield work items for one input file.
+
+    Items are ("call", record), ("stored", table path, encoded record) or
+    ("error", message) for input that could not be read or parsed.
+    """
+    if path.endswith(".jsonl"):
+        try:
+            with open(path) as f:
+                for lineno, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield ("call", json.loads(line))
+                    except ValueError as e:
+                        yield ("error", f"{path}:{lineno}: {e}")
+        except (OSError, ValueError) as e:
+            yield ("error", f"{path}: {e}")
+        return
+
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        yield ("error", f"{path}: {e}")
+        return
+
+    if CallStore.is_store_data(data):
+        try:
+            store = CallStore(path, data=data)
+            table_path = _write_table(store.table, table_dir, table_id)
+        except (OSError, ValueError) as e:
+            yield ("error", f"{path}: {e}")
+            return
+        # Encoded records go to the workers as-is and are decoded there
+        for record in store.records.values():
+            yield ("stored", table_path, record)
+    elif isinstance(data, list):
+        for record in data:
+            yield ("call", record)
+    else:
+        yield ("call", data)
+
+
+def iter_records(paths: list, table_dir: str):
+    """Yield work items for every input file, in order, opening each file as it is reached."""
+    for table_id, path in enumerate(paths):
+        yield from iter_file_records(path, table_dir, table_id)
+
+
+def iter_chunks(records, chunk_size: int):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_call(call_details: dict) -> list:
+    """Return a list of problems with a call record's structured fields."""
+    errors = []
+    if not call_details.get("id"):
+        errors.append("missing id")
+    if not isinstance(call_details.get("transcript", ""), str):
+        errors.append("transcript is not a string")
+    if not isinstance(call_details.get("messages", []), list):
+        errors.append("messages is not a list")
+
+    analysis = call_details.get("analysis", {})
+    if not isinstance(analysis, dict):
+        errors.append("analysis is not an object")
+    elif not isinstance(analysis.get("structuredData", {}), dict):
+        errors.append("analysis.structuredData is not an object")
+
+    if not isinstance(call_details.get("artifact", {}), dict):
+        errors.append("artifact is not an object")
+    return errors
+
+
+def process_call(call_details: dict, output_format: str) -> str:
+    """Run extraction, validation and formatting for one call record."""
+    if output_format == "text":
+        return format_summary(call_details)
+
+    transcript = call_details.get("transcript", "")
+    analysis = call_details.get("analysis")
+    result = {
+        "id": call_details.get("id"),
+        "status": call_details.get("status"),
+        "errors": validate_call(call_details),
+        "order_summary": extract_order_summary(transcript) if transcript and isinstance(transcript, str) else None,
+        "structured_data": analysis.get("structuredData") if isinstance(analysis, dict) else None,
+    }
+    return json.dumps(result, default=str)
+
+
+def _error_result(call_id, message: str, output_format: str) -> str:
+    if output_format == "text":
+        return f"Error processing call {call_id}: {message}" if call_id else f"Error: {message}"
+    return json.dumps({"id": call_id, "errors": [message]})
+
+
+# String tables loaded by this worker, keyed by table path. Stores are
+# read one after another, so only the most recent few are kept.
+MAX_CACHED_TABLES = 4
+_tables = collections.OrderedDict()
+
+
+def _get_table(path: str) -> StringTable:
+    table = _tables.get(path)
+    if table is None:
+        with open(path) as f:
+            table = StringTable(json.load(f))
+        _tables[path] = table
+        while len(_tables) > MAX_CACHED_TABLES:
+            _tables.popitem(last=False)
+    else:
+        _tables.move_to_end(path)
+    return table
+
+
+def process_chunk(chunk: list, output_format: str) -> list:
+    """Worker entry point: process a chunk of work items, keeping input order."""
+    results = []
+    for item in chunk:
+        if item[0] == "error":
+            results.append(_error_result(None, item[1], output_format))
+            continue
+
+        call_details = None
+        try:
+            if item[0] == "stored":
+                call_details = decode_call(item[2], _get_table(item[1]))
+            else:
+                call_details = item[1]
+            results.append(process_call(call_details, output_format))
+        except Exception as e:
+            # Report the bad record in place instead of failing the whole run
+            call_id = call_details.get("id") if isinstance(call_details, dict) else None
+            results.append(_error_result(call_id, str(e), output_format))
+    return results
+
+
+def run_pipeline(records, out, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 output_format: str = "jsonl", max_pending: int = None):
+    """
+    Process work items across a pool and write results to out in input order.
+
+    At most max_pending chunks are in flight at once, so reading stops
+    while the writer is behind. Returns (calls processed, input errors),
+    where input errors are files or lines that could not be read.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+    separator = "\n\n" if output_format == "text" else "\n"
+
+    written = 0
+    input_errors = 0
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in iter_chunks(records, chunk_size):
+            input_errors += sum(1 for item in chunk if item[0] == "error")
+            pending.append(executor.submit(process_chunk, chunk, output_format))
+            if len(pending) >= max_pending:
+                written += _write_results(pending.popleft().result(), out, separator)
+        while pending:
+            written += _write_results(pending.popleft().result(), out, separator)
+    return written - input_errors, input_errors
+
+
+def _write_results(results: list, out, separator: str) -> int:
+    for result in results:
+        out.write(result)
+        out.write(separator)
+    return len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Post-process stored Vapi call records in parallel")
+    parser.add_argument("--input", required=True, help="Call record file (JSON, JSON Lines or call store) or directory of them")
+    parser.add_argument("--output", default=None, help="Output file (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", "text"], default="jsonl", help="jsonl: one result per line; text: formatted summaries")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records sent to a worker at a time")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: {args.input} does not exist", file=sys.stderr)
+        sys.exit(1)
+    if args.chunk_size < 1 or (args.workers is not None and args.workers < 1):
+        parser.error("--workers and --chunk-size must be at least 1")
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        with tempfile.TemporaryDirectory() as table_dir:
+            calls, input_errors = run_pipeline(
+                iter_records(list_input_files(args.input), table_dir),
+                out,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                output_format=args.format,
+            )
+        print(f"Processed {calls} calls", file=sys.stderr)
+        if input_errors:
+            print(f"Could not read {input_errors} input files or lines", file=sys.stderr)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()